@@ -1,6 +1,10 @@
 import faiss
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import pandas as pd
+import numpy as np
+import os
+import hashlib
+import json
 from sentence_transformers import SentenceTransformer
 import logging
 import jaconv
@@ -21,10 +25,17 @@ def normalize_katakana_width(text: str):
     return text
 
 
+def search_dim(index: faiss.Index) -> int:
+    """実際に検索される次元数（次元削減時は内側のインデックスの次元数）"""
+    if isinstance(index, faiss.IndexPreTransform):
+        return index.index.d
+    return index.d
+
+
 @dataclass
 class IndexData:
     data: pd.DataFrame
-    index: faiss.IndexFlatIP
+    index: faiss.Index
     text_columns: List[str]
 
 
@@ -58,11 +69,20 @@ class ModelManager:
 
 
 class FaissSearch:
-    def __init__(self, csv_path: str):
+    def __init__(
+        self,
+        csv_path: str,
+        reduce_dim: Optional[int] = None,
+        index_path: Optional[str] = None,
+    ):
         # シングルトンのモデルマネージャーを使用
         self.model_manager = ModelManager()
         self.model = self.model_manager.get_model()
         self.model_name = self.model_manager.model_name
+        if reduce_dim is not None and reduce_dim <= 0:
+            raise ValueError(f"reduce_dimは正の整数で指定してください: {reduce_dim}")
+        self.reduce_dim = reduce_dim
+        self.index_path = index_path
         self.index_data: IndexData = self.make_index(csv_path)
         self.data = self.index_data.data
         self.index = self.index_data.index
@@ -110,12 +130,106 @@ class FaissSearch:
 
         return text_columns
 
+    def build_faiss_index(self, vectors: np.ndarray) -> faiss.Index:
+        """ベクトルからFAISSインデックスを作成。reduce_dim指定時は次元削減する"""
+        dim = vectors.shape[1]
+        if self.reduce_dim is None or self.reduce_dim >= dim:
+            index = faiss.IndexFlatIP(dim)
+            index.add(vectors)
+            return index
+
+        # faiss.PCAMatrixは平均を引いてから射影するため、再正規化後のスコアが
+        # 元のコサイン類似度から大きくずれる。中心化しない主成分(二次モーメント行列の
+        # 固有ベクトル)で射影し、元の内積をできるだけ保つ
+        _, eigenvectors = np.linalg.eigh(vectors.T @ vectors)
+        components = eigenvectors[:, ::-1][:, : self.reduce_dim].T
+        projection = faiss.LinearTransform(dim, self.reduce_dim, False)
+        faiss.copy_array_to_vector(
+            np.ascontiguousarray(components, dtype="float32").ravel(), projection.A
+        )
+        projection.is_trained = True
+
+        # 射影 -> L2正規化 -> 内積検索 の順で適用（クエリにも自動で適用される）
+        index = faiss.IndexPreTransform(
+            faiss.NormalizationTransform(self.reduce_dim),
+            faiss.IndexFlatIP(self.reduce_dim),
+        )
+        index.prepend_transform(projection)
+        index.add(vectors)
+        logger.info(f"次元削減を適用: {dim} -> {self.reduce_dim}")
+        return index
+
+    def make_fingerprint(self, csv_path: str) -> Dict[str, Any]:
+        """保存済みインデックスの再利用可否を判定するための情報"""
+        with open(csv_path, "rb") as f:
+            csv_sha256 = hashlib.sha256(f.read()).hexdigest()
+        return {
+            "csv_sha256": csv_sha256,
+            "model_name": self.model_name,
+            "reduce_dim": self.reduce_dim,
+        }
+
+    def load_index(
+        self, fingerprint: Dict[str, Any], expected_count: int
+    ) -> Optional[faiss.Index]:
+        """index_pathに保存済みのインデックスがあり、作成条件が一致すれば読み込む"""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return None
+
+        try:
+            with open(f"{self.index_path}.meta.json", encoding="utf-8") as f:
+                saved_fingerprint = json.load(f)
+            index = faiss.read_index(self.index_path)
+        except Exception as e:
+            logger.warning(
+                f"保存済みインデックスの読み込みに失敗したため再作成します: {self.index_path} ({e})"
+            )
+            return None
+
+        if saved_fingerprint != fingerprint or index.ntotal != expected_count:
+            logger.warning(
+                f"保存済みインデックスがデータ・モデル・設定と一致しないため再作成します: {self.index_path}"
+            )
+            return None
+
+        logger.info(
+            f"保存済みFAISSインデックスを読み込みました: {index.ntotal}件, 次元数: {search_dim(index)}"
+        )
+        return index
+
+    def save_index(self, index: faiss.Index, fingerprint: Dict[str, Any]):
+        """射影行列を含むインデックス全体と作成条件をindex_pathに保存（失敗時は警告のみ）"""
+        if not self.index_path:
+            return
+
+        # 一時ファイルに書き込んでから置き換え、作成条件はインデックスの保存後に書き込む
+        # （書き込み途中のインデックスに一致する作成条件が残らないようにする）
+        meta_path = f"{self.index_path}.meta.json"
+        try:
+            faiss.write_index(index, f"{self.index_path}.tmp")
+            os.replace(f"{self.index_path}.tmp", self.index_path)
+            with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(fingerprint, f, ensure_ascii=False)
+            os.replace(f"{meta_path}.tmp", meta_path)
+        except Exception as e:
+            logger.warning(
+                f"FAISSインデックスの保存に失敗しました（検索は継続します）: {self.index_path} ({e})"
+            )
+            return
+        logger.info(f"FAISSインデックスを保存しました: {self.index_path}")
+
     def make_index(self, csv_path: str) -> IndexData:
         try:
             data = pd.read_csv(csv_path)
             text_columns = self.detect_text_columns(data)
             logger.info(f"検出されたテキストカラム: {text_columns}")
 
+            # 作成条件(CSVのハッシュ等)はインデックスを保存・再利用する場合のみ計算
+            fingerprint = self.make_fingerprint(csv_path) if self.index_path else {}
+            index = self.load_index(fingerprint, len(data))
+            if index is not None:
+                return IndexData(data=data, index=index, text_columns=text_columns)
+
             def preprocess_row(row):
                 return " ".join(
                     [
@@ -133,11 +247,11 @@ class FaissSearch:
             vectors = self.model.encode(
                 texts, show_progress_bar=False, normalize_embeddings=True
             )
-            index = faiss.IndexFlatIP(vectors.shape[1])
-            index.add(vectors.astype("float32"))
+            index = self.build_faiss_index(vectors.astype("float32"))
+            self.save_index(index, fingerprint)
 
             logger.info(
-                f"FAISSインデックス作成完了: {index.ntotal}件, 次元数: {vectors.shape[1]}"
+                f"FAISSインデックス作成完了: {index.ntotal}件, 次元数: {search_dim(index)}"
             )
 
             return IndexData(data=data, index=index, text_columns=text_columns)
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Literal, Optional
 import pandas as pd
 import logging
 import os
 from .faiss_serch import FaissSearch, normalize_katakana_width
+from .response_format import (
+    SEARCH_RESPONSES,
+    build_response,
+    negotiate_content_encoding,
+    negotiate_media_type,
+    to_columnar,
+)
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +40,23 @@ def normalize_query(text: str) -> str:
     return normalized_text
 
 
+def load_reduce_dim() -> Optional[int]:
+    """環境変数FAISS_REDUCE_DIMから次元削減後の次元数を取得（不正な値の場合は削減なし）"""
+    value = os.environ.get("FAISS_REDUCE_DIM")
+    if not value:
+        return None
+    try:
+        reduce_dim = int(value)
+    except ValueError:
+        reduce_dim = 0
+    if reduce_dim <= 0:
+        logger.error(
+            f"FAISS_REDUCE_DIMは正の整数で指定してください: '{value}'（次元削減なしで起動します）"
+        )
+        return None
+    return reduce_dim
+
+
 # FAISSインデックスを初期化
 faiss_search = None
 
@@ -49,8 +73,15 @@ async def lifespan(app: FastAPI):
     # FAISSインデックスを構築
     try:
         knowledge_path = "DATA/なれっじ.csv"
+        # 次元削減とインデックス保存先は環境変数で指定（未指定時は削減なし・保存なし）
+        reduce_dim = load_reduce_dim()
+        index_path = os.environ.get("FAISS_INDEX_PATH")
         if os.path.exists(knowledge_path):
-            faiss_search = FaissSearch(knowledge_path)
+            faiss_search = FaissSearch(
+                knowledge_path,
+                reduce_dim=reduce_dim,
+                index_path=index_path,
+            )
             logger.info("FAISSインデックスの構築が完了しました")
         else:
             logger.error(f"知識データファイルが見つかりません: {knowledge_path}")
@@ -89,8 +120,9 @@ async def root():
     }
 
 
-@app.post("/knowledge/search")
+@app.post("/knowledge/search", responses=SEARCH_RESPONSES)
 async def search_knowledge(
+    request: Request,
     text: str = Query(..., description="検索対象のテキスト"),
     top_k: int = Query(
         3,
@@ -108,7 +140,11 @@ async def search_knowledge(
         3, description="閾値未満の場合に再検索する最小件数（デフォルト3）", ge=1, le=100
     ),
     fallback: bool = Query(False, description="閾値未満の場合に再検索を行うかどうか"),
-) -> Dict[str, Any]:
+    layout: Literal["records", "columnar"] = Query(
+        "records",
+        description="結果の形式（records: 1件ごとのオブジェクト、columnar: カラムごとの配列）",
+    ),
+) -> Response:
     """
     知識ベースから類似したコンテンツを検索する
 
@@ -118,9 +154,12 @@ async def search_knowledge(
         threshold: 類似度スコアの閾値（デフォルト0.5、0.0〜1.0の範囲）
         min_k: 閾値未満の場合に再検索する最小件数（デフォルト3、最大100）
         fallback: 閾値未満の場合に再検索を行うかどうか,（デフォルトFalse）
+        layout: 結果の形式。columnarの場合はカラム名を1回だけ送信（デフォルトrecords）
 
     Returns:
-        検索結果のJSON（要求件数、データ総件数、実際の返却件数を含む）
+        検索結果（要求件数、データ総件数、実際の返却件数を含む）。
+        Acceptヘッダーに応じてJSON/MessagePack/Arrow IPCで返却し、
+        Accept-Encodingに応じてgzip/zstdで圧縮する
     """
 
     if faiss_search is None:
@@ -131,6 +170,12 @@ async def search_knowledge(
     if not text or not text.strip():
         raise HTTPException(status_code=400, detail="検索テキストが空です")
 
+    # 返却形式・圧縮方式は検索前に決定（対応できない形式の場合はここで406）
+    media_type = negotiate_media_type(request.headers.get("accept", ""))
+    content_encoding = negotiate_content_encoding(
+        request.headers.get("accept-encoding", "")
+    )
+
     try:
         # クエリを正規化
         temp = normalize_katakana_width(text)
@@ -152,13 +197,16 @@ async def search_knowledge(
         else:
             results = faiss_search.search(normalized_query, actual_n, threshold)
 
+        columns = ["rank", "similarity_score"] + list(faiss_search.data.columns)
         response = {
             "query": text,
             "normalized_query": normalized_query,
             "requested_count": top_k,
             "total_data_count": total_data_count,
             "actual_returned_count": len(results),
-            "results": results,
+            "results": (
+                to_columnar(results, columns) if layout == "columnar" else results
+            ),
         }
 
         if top_k > total_data_count:
@@ -168,7 +216,7 @@ async def search_knowledge(
         else:
             logger.info(f"検索完了: {len(results)}件の結果を返却")
 
-        return response
+        return build_response(response, columns, media_type, content_encoding)
 
     except Exception as e:
         logger.error(f"検索エラー: {e}")
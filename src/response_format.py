@@ -0,0 +1,279 @@
+import gzip
+import io
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 高速化用の任意依存パッケージ（未インストールの場合は該当機能を無効化）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# このサイズ(バイト)以上のレスポンスのみ圧縮する
+COMPRESSION_MIN_SIZE = 1024
+
+# /knowledge/search のOpenAPI定義（Responseを直接返すため形式ごとに明示する）
+_BINARY_SCHEMA = {"type": "string", "format": "binary"}
+SEARCH_RESPONSES: Dict[Any, Dict[str, Any]] = {
+    200: {
+        "description": (
+            "検索結果。Acceptヘッダーに応じてJSON/MessagePack/Arrow IPCで返却し、"
+            "Accept-Encodingに応じてgzip/zstdで圧縮する"
+        ),
+        "content": {
+            JSON_MEDIA_TYPE: {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "normalized_query": {"type": "string"},
+                        "requested_count": {"type": "integer"},
+                        "total_data_count": {"type": "integer"},
+                        "actual_returned_count": {"type": "integer"},
+                        "results": {
+                            "oneOf": [
+                                {
+                                    "type": "array",
+                                    "description": "layout=records: 1件ごとのオブジェクト",
+                                    "items": {
+                                        "type": "object",
+                                        "additionalProperties": True,
+                                    },
+                                },
+                                {
+                                    "type": "object",
+                                    "description": "layout=columnar: カラム名ごとの値の配列",
+                                    "additionalProperties": {"type": "array"},
+                                },
+                            ]
+                        },
+                    },
+                },
+                "examples": {
+                    "records": {
+                        "value": {
+                            "query": "FastAPI",
+                            "normalized_query": "FastAPI",
+                            "requested_count": 1,
+                            "total_data_count": 20,
+                            "actual_returned_count": 1,
+                            "results": [
+                                {
+                                    "rank": 1,
+                                    "similarity_score": 0.8542,
+                                    "id": "1",
+                                    "title": "FastAPIの基本的な使い方",
+                                }
+                            ],
+                        }
+                    },
+                    "columnar": {
+                        "value": {
+                            "query": "FastAPI",
+                            "normalized_query": "FastAPI",
+                            "requested_count": 1,
+                            "total_data_count": 20,
+                            "actual_returned_count": 1,
+                            "results": {
+                                "rank": [1],
+                                "similarity_score": [0.8542],
+                                "id": ["1"],
+                                "title": ["FastAPIの基本的な使い方"],
+                            },
+                        }
+                    },
+                },
+            },
+            MSGPACK_MEDIA_TYPES[0]: {
+                "schema": {
+                    **_BINARY_SCHEMA,
+                    "description": "JSONと同じ構造をMessagePackでエンコード（要msgpack）",
+                }
+            },
+            ARROW_MEDIA_TYPE: {
+                "schema": {
+                    **_BINARY_SCHEMA,
+                    "description": (
+                        "結果をカラム形式のテーブルとしたArrow IPCストリーム。"
+                        "結果以外の項目はスキーマのメタデータに格納（要pyarrow）"
+                    ),
+                }
+            },
+        },
+    },
+    406: {"description": "Acceptヘッダーで受け入れ可能な形式をサーバーが生成できない"},
+}
+
+
+def to_columnar(results: List[Dict[str, Any]], columns: List[str]) -> Dict[str, list]:
+    """行ごとの検索結果をカラムごとの配列に変換（カラム名は1回のみ送信）"""
+    return {col: [result.get(col) for result in results] for col in columns}
+
+
+def parse_quality_header(value: str) -> List[Tuple[str, float]]:
+    """Accept/Accept-Encodingヘッダーを(値, q値)のリストに分解（不正なq値の項目は無視）"""
+    parsed = []
+    for item in value.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        try:
+            for param in params:
+                name, _, param_value = param.partition("=")
+                if name.strip().lower() == "q":
+                    quality = float(param_value)
+        except ValueError:
+            continue
+        parsed.append((token.lower(), quality))
+    return parsed
+
+
+def matches_range(value: str, media_range: str) -> bool:
+    """valueがワイルドカードの範囲(*/*, application/*, *)に含まれるか"""
+    if media_range in ("*", "*/*"):
+        return True
+    return media_range.endswith("/*") and value.startswith(media_range[:-1])
+
+
+def select_by_quality(
+    header: str, available: List[str], wildcards: Tuple[str, ...]
+) -> Optional[str]:
+    """サーバーが生成可能な値のうちq値が最大のものを選択
+
+    各値のq値は最も具体的に一致する項目（完全一致 -> application/* -> */* の順）から決まり、
+    q=0の値は除外する。同値の場合はヘッダーの記載順、さらに同じ場合はavailableの順
+    """
+    parsed = parse_quality_header(header)
+    positions: Dict[str, Tuple[int, float]] = {}
+    for position, (token, quality) in enumerate(parsed):
+        positions.setdefault(token, (position, quality))
+
+    best, best_key = None, None
+    for order, value in enumerate(available):
+        ranges = [value] + [w for w in wildcards if matches_range(value, w)]
+        matched = next((r for r in ranges if r in positions), None)
+        if matched is None:
+            continue
+        position, quality = positions[matched]
+        if quality <= 0:
+            continue
+        key = (quality, -position, -order)
+        if best_key is None or key > best_key:
+            best, best_key = value, key
+    return best
+
+
+def negotiate_media_type(accept: str) -> str:
+    """Acceptヘッダーから返却フォーマットを決定（未指定の場合はJSON）"""
+    if not accept.strip():
+        return JSON_MEDIA_TYPE
+
+    available = [JSON_MEDIA_TYPE]
+    if msgpack is not None:
+        available.extend(MSGPACK_MEDIA_TYPES)
+    if pa is not None:
+        available.append(ARROW_MEDIA_TYPE)
+
+    media_type = select_by_quality(accept, available, ("application/*", "*/*"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"対応可能な形式がありません（利用可能: {', '.join(available)}）",
+        )
+    return media_type
+
+
+def negotiate_content_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encodingヘッダーから圧縮方式を決定（該当なしの場合は無圧縮）"""
+    available = ["gzip"]
+    if zstandard is not None:
+        available.insert(0, "zstd")
+    return select_by_quality(accept_encoding, available, ("*",))
+
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    """orjsonが利用可能であれば使用し、なければ標準のjsonでエンコード"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encode_arrow(payload: Dict[str, Any], columns: List[str]) -> bytes:
+    """検索結果をArrow IPCストリームに変換。結果以外の項目はスキーマのメタデータに格納"""
+    results = payload["results"]
+    if isinstance(results, list):
+        results = to_columnar(results, columns)
+
+    metadata = {
+        key: json.dumps(value, ensure_ascii=False)
+        for key, value in payload.items()
+        if key != "results"
+    }
+    table = pa.Table.from_pydict(results).replace_schema_metadata(metadata)
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def compress(
+    body: bytes, content_encoding: Optional[str]
+) -> Tuple[bytes, Optional[str]]:
+    """zstd/gzipで圧縮（閾値未満は無圧縮）"""
+    if content_encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return body, None
+    if content_encoding == "zstd":
+        return zstandard.ZstdCompressor().compress(body), "zstd"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+def build_response(
+    payload: Dict[str, Any],
+    columns: List[str],
+    media_type: str,
+    content_encoding: Optional[str],
+) -> Response:
+    """ネゴシエーション済みの形式・圧縮方式でレスポンスを作成する"""
+    if media_type == ARROW_MEDIA_TYPE:
+        body = encode_arrow(payload, columns)
+    elif media_type in MSGPACK_MEDIA_TYPES:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = encode_json(payload)
+
+    body, content_encoding = compress(body, content_encoding)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
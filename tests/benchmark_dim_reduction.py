@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+次元削減の精度(recall@k)と検索速度のベンチマーク
+
+使用方法:
+    python tests/benchmark_dim_reduction.py <CSVパス> [top_k] [threshold]
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss  # noqa: E402
+from src.faiss_serch import FaissSearch, search_dim  # noqa: E402
+
+REDUCE_DIMS = [512, 256, 128]
+QUERIES = [
+    "FastAPI",
+    "機械学習",
+    "RAG",
+    "API",
+    "データ処理",
+    "Python",
+    "データベース",
+    "検索エンジン",
+]
+
+
+def measure_latency(faiss_search, query_vectors, top_k, repeat=10):
+    """エンコード時間を除いたFAISS検索の平均時間(ms/クエリ)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        faiss_search.index.search(query_vectors, top_k)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(query_vectors))
+
+
+def search_rows(faiss_search, top_k, threshold):
+    """FaissSearch.search経由（閾値あり）で取得した結果の行（全カラムの値で識別）"""
+    columns = list(faiss_search.data.columns)
+    return [
+        {
+            tuple(result[col] for col in columns)
+            for result in faiss_search.search(query, top_k, threshold)
+        }
+        for query in QUERIES
+    ]
+
+
+def recall(truth, found):
+    total = sum(len(t) for t in truth)
+    if total == 0:
+        return float("nan")
+    return sum(len(t & f) for t, f in zip(truth, found)) / total
+
+
+def benchmark_dim_reduction(csv_path, top_k=5, threshold=0.5):
+    """元の次元数と512/256/128次元でのrecall@kとレイテンシを比較"""
+
+    print("=== 次元削減ベンチマーク ===\n")
+
+    baseline = FaissSearch(csv_path)
+    n = len(baseline.data)
+    top_k = min(top_k, n)
+
+    queries = QUERIES
+    if "e5" in baseline.model_name:
+        queries = [f"query: {q}" for q in queries]
+    query_vectors = baseline.model.encode(
+        queries, show_progress_bar=False, normalize_embeddings=True
+    ).astype("float32")
+
+    _, base_indices = baseline.index.search(query_vectors, top_k)
+    truth = [set(row[row != -1].tolist()) for row in base_indices]
+    truth_threshold = search_rows(baseline, top_k, threshold)
+
+    print(f"データ件数: {n}件, top_k: {top_k}, threshold: {threshold}\n")
+    print(
+        f"{'次元数':>6} | {'recall@k':>8} | {'recall@k(閾値あり)':>10} | {'検索時間(ms/クエリ)':>10}"
+    )
+    base_ms = measure_latency(baseline, query_vectors, top_k)
+    print(
+        f"{search_dim(baseline.index):>6} | {1.0:>8.4f} | {1.0:>10.4f} | {base_ms:>10.4f}"
+    )
+
+    for dim in REDUCE_DIMS:
+        reduced = FaissSearch(csv_path, reduce_dim=dim)
+        if not isinstance(reduced.index, faiss.IndexPreTransform):
+            raise SystemExit(f"{dim}次元への次元削減が適用されませんでした")
+
+        _, indices = reduced.index.search(query_vectors, top_k)
+        found = [set(row[row != -1].tolist()) for row in indices]
+        found_threshold = search_rows(reduced, top_k, threshold)
+        elapsed_ms = measure_latency(reduced, query_vectors, top_k)
+        print(
+            f"{search_dim(reduced.index):>6} | {recall(truth, found):>8.4f} | "
+            f"{recall(truth_threshold, found_threshold):>10.4f} | {elapsed_ms:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    benchmark_dim_reduction(sys.argv[1], top_k, threshold)
@@ -0,0 +1,70 @@
+import requests
+import json
+
+
+def test_response_format():
+    """レスポンス形式（columnar / MessagePack / Arrow）と圧縮のテスト"""
+
+    base_url = "http://localhost:8000"
+    params = {"text": "FastAPI", "top_k": 100}
+
+    print("=== レスポンス形式テスト ===\n")
+
+    # 1. 通常のJSONとカラム形式のサイズ比較
+    print("1. records / columnar")
+    for layout in ["records", "columnar"]:
+        try:
+            response = requests.post(
+                f"{base_url}/knowledge/search",
+                params={**params, "layout": layout},
+                headers={"Accept-Encoding": "identity"},
+            )
+            print(f"[{layout}] ステータス: {response.status_code}")
+            print(f"  サイズ: {len(response.content)}バイト")
+            if layout == "columnar" and response.status_code == 200:
+                results = response.json()["results"]
+                print(f"  カラム: {list(results.keys())}")
+        except Exception as e:
+            print(f"エラー: {e}")
+
+    print("\n" + "=" * 50 + "\n")
+
+    # 2. バイナリ形式
+    print("2. バイナリ形式")
+    for accept in ["application/x-msgpack", "application/vnd.apache.arrow.stream"]:
+        try:
+            response = requests.post(
+                f"{base_url}/knowledge/search",
+                params=params,
+                headers={"Accept": accept},
+            )
+            print(f"[{accept}] ステータス: {response.status_code}")
+            print(f"  Content-Type: {response.headers.get('content-type')}")
+            print(f"  サイズ: {len(response.content)}バイト")
+            if response.status_code == 406:
+                print(f"  {json.loads(response.text)['detail']}")
+        except Exception as e:
+            print(f"エラー: {e}")
+
+    print("\n" + "=" * 50 + "\n")
+
+    # 3. 圧縮
+    print("3. 圧縮")
+    for encoding in ["gzip", "zstd"]:
+        try:
+            response = requests.post(
+                f"{base_url}/knowledge/search",
+                params=params,
+                headers={"Accept-Encoding": encoding},
+                stream=True,
+            )
+            compressed = response.raw.read()
+            print(f"[{encoding}] ステータス: {response.status_code}")
+            print(f"  Content-Encoding: {response.headers.get('content-encoding')}")
+            print(f"  転送サイズ: {len(compressed)}バイト")
+        except Exception as e:
+            print(f"エラー: {e}")
+
+
+if __name__ == "__main__":
+    test_response_format()